@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import numpy as np
+import hashlib
 import json
 import os
 
@@ -9,6 +12,15 @@ FILE_PATH_WINE = "WineQT.csv"
 FILE_PATH_SUMMARY = "../feature_selection/export_bnb_summary.json"
 FILE_PATH_TREE = "../feature_selection/export_bnb_tree.json"
 FILE_PATH_HEURISTIC = "../feature_selection/export_heuristic_comparison.json"
+FILE_PATH_STABILITY = "../feature_selection/export_bnb_stability.json"
+FILE_PATH_TELEMETRY = "../feature_selection/export_bnb_telemetry.json"
+
+# EDA: os gráficos recebem apenas agregados calculados no servidor,
+# e pontos brutos só de uma amostra limitada (independente do nº de linhas)
+EDA_SAMPLE_SIZE = 2000
+EDA_MAX_HIST_BINS = 60
+EDA_DENSITY_BINS = 50
+EDA_MAX_OUTLIERS = 500
 
 st.set_page_config(
     page_title="Projeto Branch and Bound - Wine Quality",
@@ -47,12 +59,158 @@ df_wine = load_data(FILE_PATH_WINE)
 bnb_summary = load_json_data(FILE_PATH_SUMMARY)
 bnb_tree = load_json_data(FILE_PATH_TREE)
 bnb_heuristic_comp = load_json_data(FILE_PATH_HEURISTIC)
+# Opcional: só existe depois de executar o solver com `--stability`
+bnb_stability = load_json_data(FILE_PATH_STABILITY) if os.path.exists(FILE_PATH_STABILITY) else None
+# Opcional: só existe depois de executar o solver com `--telemetry`
+bnb_telemetry = load_json_data(FILE_PATH_TELEMETRY) if os.path.exists(FILE_PATH_TELEMETRY) else None
 
 
 if df_wine.empty:
     st.stop() 
 
 
+# --- Agregados da EDA (calculados no servidor e guardados em cache) ---
+# O DataFrame entra como `_df` (o Streamlit não o hasheia a cada rerun);
+# a chave da cache é o hash do dataset, calculado uma única vez.
+
+@st.cache_data
+def compute_dataset_hash(path):
+    df = load_data(path)
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes() + ','.join(df.columns).encode()).hexdigest()
+
+@st.cache_data
+def compute_descriptive_stats(_df, dataset_hash):
+    return _df.describe().T[['mean', '50%', 'std']].rename(columns={'50%': 'Mediana', 'mean': 'Média', 'std': 'Desvio Padrão'})
+
+@st.cache_data
+def compute_eda_sample(_df, dataset_hash):
+    if len(_df) <= EDA_SAMPLE_SIZE:
+        return _df
+    return _df.sample(n=EDA_SAMPLE_SIZE, random_state=0)
+
+@st.cache_data
+def compute_histogram_and_box(_df, dataset_hash, column):
+    """Histograma e estatísticas do box plot de uma coluna, com NumPy."""
+    values = _df[column].dropna().to_numpy(dtype=float)
+    if values.size == 0:
+        return None
+
+    v_min, v_max = values.min(), values.max()
+    if np.all(values == np.round(values)) and v_max - v_min <= EDA_MAX_HIST_BINS:
+        # Variável discreta (ex: quality): um intervalo por valor inteiro
+        edges = np.arange(v_min - 0.5, v_max + 1.5)
+    else:
+        edges = np.histogram_bin_edges(values, bins='auto')
+        if len(edges) - 1 > EDA_MAX_HIST_BINS:
+            edges = np.histogram_bin_edges(values, bins=EDA_MAX_HIST_BINS)
+    counts, edges = np.histogram(values, bins=edges)
+
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+    if outliers.size > EDA_MAX_OUTLIERS:
+        outliers = np.random.default_rng(0).choice(outliers, EDA_MAX_OUTLIERS, replace=False)
+
+    return {
+        "edges": edges,
+        "counts": counts,
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "mean": values.mean(),
+        "lowerfence": inside.min(),
+        "upperfence": inside.max(),
+        "outliers": outliers
+    }
+
+@st.cache_data
+def compute_density_and_trendline(_df, dataset_hash, x_column, y_column):
+    """Densidade 2D (contagens por célula) e reta de mínimos quadrados de y em x."""
+    xy = _df[[x_column, y_column]].dropna().to_numpy(dtype=float)
+    x, y = xy[:, 0], xy[:, 1]
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=EDA_DENSITY_BINS)
+
+    x_centered = x - x.mean()
+    y_centered = y - y.mean()
+    sxx = x_centered @ x_centered
+    sxy = x_centered @ y_centered
+    syy = y_centered @ y_centered
+    slope = sxy / sxx if sxx > 0 else 0.0
+    intercept = y.mean() - slope * x.mean()
+    r2 = sxy ** 2 / (sxx * syy) if sxx > 0 and syy > 0 else 0.0
+
+    return {
+        "counts": counts,
+        "x_edges": x_edges,
+        "y_edges": y_edges,
+        "slope": slope,
+        "intercept": intercept,
+        "r2": r2,
+        "x_range": (x.min(), x.max())
+    }
+
+
+def generate_histogram_fig(hist_data, column, color):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+
+    fig.add_trace(go.Box(
+        q1=[hist_data['q1']], median=[hist_data['median']], q3=[hist_data['q3']],
+        lowerfence=[hist_data['lowerfence']], upperfence=[hist_data['upperfence']],
+        mean=[hist_data['mean']], y=[column], orientation='h',
+        marker_color=color, hoverinfo='x'
+    ), row=1, col=1)
+    if len(hist_data['outliers']) > 0:
+        fig.add_trace(go.Scatter(
+            x=hist_data['outliers'], y=[column] * len(hist_data['outliers']),
+            mode='markers', marker=dict(color=color, size=4), hoverinfo='x'
+        ), row=1, col=1)
+
+    edges = hist_data['edges']
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=hist_data['counts'], width=np.diff(edges),
+        marker_color=color, hovertemplate='%{x}<br>Contagem: %{y}<extra></extra>'
+    ), row=2, col=1)
+
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_yaxes(title='Contagem', row=2, col=1)
+    fig.update_xaxes(title=column, row=2, col=1)
+    fig.update_layout(title=f"Distribuição de **{column}**", showlegend=False, bargap=0)
+    return fig
+
+def generate_density_fig(density_data, sample_df, x_column, y_column, title, color):
+    x_edges, y_edges = density_data['x_edges'], density_data['y_edges']
+    counts = density_data['counts'].T.astype(float)
+    counts[counts == 0] = np.nan # Células vazias ficam transparentes
+
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        z=counts,
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        colorscale=[[0, '#FFFFFF'], [1, color]],
+        colorbar=dict(title='Nº de Linhas'),
+        hovertemplate=f'{x_column}: %{{x}}<br>{y_column}: %{{y}}<br>Linhas: %{{z}}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=sample_df[x_column], y=sample_df[y_column],
+        mode='markers', marker=dict(color=color, size=4, opacity=0.3),
+        name='Amostra', hoverinfo='skip'
+    ))
+
+    x0, x1 = density_data['x_range']
+    fig.add_trace(go.Scatter(
+        x=[x0, x1],
+        y=[density_data['intercept'] + density_data['slope'] * x0, density_data['intercept'] + density_data['slope'] * x1],
+        mode='lines', line=dict(color='#333', width=2),
+        name=f"OLS (R²={density_data['r2']:.3f})"
+    ))
+
+    fig.update_layout(title=title, xaxis_title=x_column, yaxis_title=y_column, showlegend=False)
+    return fig
+
+
 def generate_plotly_tree_viz(tree_data, summary_data):
     if not tree_data or not summary_data:
         return go.Figure()
@@ -206,6 +364,77 @@ def generate_plotly_tree_viz(tree_data, summary_data):
     return fig
 
 
+def generate_telemetry_figures(telemetry_data):
+    """Vistas agregadas da árvore para buscas exportadas em modo de telemetria."""
+    status_colors = {
+        "EXPLORADO": '#4DD0E1',
+        "SOLUCAO_OTIMA_ATUAL": '#4CAF50',
+        "PODADO_SOLUCAO_PIOR": '#C8E6C9',
+        "PODADO_BOUND": '#FFAB91',
+        "FOLHA_INVALIDA": '#FFCDD2'
+    }
+    figures = {}
+
+    df_status = pd.DataFrame(telemetry_data.get('status_by_depth', []))
+    if not df_status.empty:
+        fig_status = px.bar(
+            df_status,
+            x='depth',
+            y='count',
+            color='status',
+            title='Nós por Profundidade e Status',
+            color_discrete_map=status_colors
+        )
+        fig_status.update_layout(xaxis_title='Profundidade na Árvore', yaxis_title='Nº de Nós', legend_title='Status')
+        fig_status.update_xaxes(dtick=1)
+        figures['status'] = fig_status
+
+    histograms = telemetry_data.get('score_histogram_by_depth', {})
+    hist_rows = histograms.get('counts', [])
+    bin_edges = histograms.get('bin_edges', [])
+    if hist_rows and bin_edges:
+        bin_labels = [f"{bin_edges[i]:.2f}–{bin_edges[i + 1]:.2f}" for i in range(len(bin_edges) - 1)]
+        fig_hist = go.Figure(go.Heatmap(
+            z=[row['counts'] for row in hist_rows],
+            x=bin_labels,
+            y=[row['depth'] for row in hist_rows],
+            colorscale='Purples',
+            colorbar=dict(title='Nós')
+        ))
+        fig_hist.update_layout(title='Distribuição do R² por Profundidade', xaxis_title='Intervalo de R²', yaxis_title='Profundidade na Árvore')
+        figures['score_histogram'] = fig_hist
+
+    df_prune = pd.DataFrame(telemetry_data.get('prune_rate_timeline', []))
+    if not df_prune.empty:
+        fig_prune = px.line(
+            df_prune,
+            x='nodes_processed',
+            y='prune_rate',
+            title='Taxa de Poda ao Longo da Busca',
+            color_discrete_sequence=['#d53e4f']
+        )
+        fig_prune.update_layout(xaxis_title='Nós Processados', yaxis_title='Fração de Nós Podados', yaxis_tickformat='.0%')
+        figures['prune_rate'] = fig_prune
+
+    df_sample = pd.DataFrame(telemetry_data.get('reservoir_sample', []))
+    if not df_sample.empty:
+        df_sample = df_sample[df_sample['status'] != 'PODADO_BOUND'].dropna(subset=['score'])
+        df_sample['Features'] = df_sample['features'].apply(lambda x: ', '.join(x))
+        fig_sample = px.strip(
+            df_sample,
+            x='depth',
+            y='score',
+            color='status',
+            hover_data=['id', 'decision', 'Features'],
+            title='Amostra de Nós Avaliados (Reservoir Sample)',
+            color_discrete_map=status_colors
+        )
+        fig_sample.update_layout(xaxis_title='Profundidade na Árvore', yaxis_title='Score R²', legend_title='Status')
+        figures['sample'] = fig_sample
+
+    return figures
+
+
 st.sidebar.title("Menu do Projeto")
 
 pages = ["1. EDA e Base de Dados", "2. Execução do Branch and Bound", "3. Resultados e Validação"]
@@ -214,6 +443,8 @@ page = st.sidebar.radio("Seções", pages)
 
 if page == "1. EDA e Base de Dados":
     st.header("1. Análise Exploratória de Dados (EDA) e Base")
+    wine_hash = compute_dataset_hash(FILE_PATH_WINE)
+    wine_sample = compute_eda_sample(df_wine, wine_hash)
     st.markdown("Visualização das características físico-químicas do **Wine Quality Dataset** e seus padrões iniciais, que fundamentam a modelagem.")
     st.write("---")
 
@@ -229,7 +460,7 @@ if page == "1. EDA e Base de Dados":
 
     with col2:
         st.write("Estatísticas Descritivas (Média, Mediana, Desvio Padrão):")
-        stats_df = df_wine.describe().T[['mean', '50%', 'std']].rename(columns={'50%': 'Mediana', 'mean': 'Média', 'std': 'Desvio Padrão'})
+        stats_df = compute_descriptive_stats(df_wine, wine_hash)
         st.dataframe(stats_df, use_container_width=True) 
 
     st.write("---")
@@ -244,15 +475,10 @@ if page == "1. EDA e Base de Dados":
         index=all_cols.index('quality') if 'quality' in all_cols else 0
     )
 
-    fig_hist = px.histogram(
-        df_wine, 
-        x=var_selecionada, 
-        title=f"Distribuição de **{var_selecionada}**",
-        marginal="box", 
-        color_discrete_sequence=['#9e0142'] 
-    )
-    fig_hist.update_layout(showlegend=False)
-    st.plotly_chart(fig_hist, use_container_width=True)
+    hist_data = compute_histogram_and_box(df_wine, wine_hash, var_selecionada)
+    if hist_data:
+        fig_hist = generate_histogram_fig(hist_data, var_selecionada, '#9e0142')
+        st.plotly_chart(fig_hist, use_container_width=True)
 
     st.info(
         "**Assimetria:** Observamos assimetria acentuada em variáveis como `chlorides`, `total sulfur dioxide` e `residual sugar`. Optou-se por não transformar os dados para facilitar a interpretação na otimização combinatória."
@@ -265,49 +491,53 @@ if page == "1. EDA e Base de Dados":
     col3, col4 = st.columns(2)
     
     with col3:
-        fig_scatter1 = px.scatter(
-            df_wine,
-            x="alcohol", 
-            y="quality",
-            trendline="ols", 
-            title="Relação: Teor Alcoólico vs. Qualidade",
-            color_discrete_sequence=['#5e4fa2']
+        fig_scatter1 = generate_density_fig(
+            compute_density_and_trendline(df_wine, wine_hash, "alcohol", "quality"),
+            wine_sample,
+            "alcohol",
+            "quality",
+            "Relação: Teor Alcoólico vs. Qualidade",
+            '#5e4fa2'
         )
         st.plotly_chart(fig_scatter1, use_container_width=True)
         st.caption("Vinhos com maior teor alcoólico tendem a ter maior qualidade.")
 
     
     with col4:
-        fig_scatter2 = px.scatter(
-            df_wine,
-            x="volatile acidity", 
-            y="quality",
-            trendline="ols",
-            title="Relação: Acidez Volátil vs. Qualidade",
-            color_discrete_sequence=['#d53e4f']
+        fig_scatter2 = generate_density_fig(
+            compute_density_and_trendline(df_wine, wine_hash, "volatile acidity", "quality"),
+            wine_sample,
+            "volatile acidity",
+            "quality",
+            "Relação: Acidez Volátil vs. Qualidade",
+            '#d53e4f'
         )
         st.plotly_chart(fig_scatter2, use_container_width=True)
         st.caption("Relação negativa: O excesso de acidez volátil está associado a menor qualidade.")
 
     
     st.write("##### Correlação Forte entre Variáveis Preditivas:")
-    fig_corr = px.scatter(
-        df_wine,
-        x="residual sugar",
-        y="density",
-        title="Correlação entre Residual Sugar e Density",
-        trendline="ols",
-        color_discrete_sequence=['#fee08b']
+    fig_corr = generate_density_fig(
+        compute_density_and_trendline(df_wine, wine_hash, "residual sugar", "density"),
+        wine_sample,
+        "residual sugar",
+        "density",
+        "Correlação entre Residual Sugar e Density",
+        '#fee08b'
     )
     st.plotly_chart(fig_corr, use_container_width=True)
     st.caption("Forte correlação observada entre `residual sugar` e `density`.")
+    st.caption(f"Os gráficos de dispersão mostram a densidade de todas as {df_wine.shape[0]} linhas (células coloridas) e uma amostra de até {EDA_SAMPLE_SIZE} pontos.")
 
 elif page == "2. Execução do Branch and Bound":
     st.header("2. Execução do Branch and Bound (B&B)")
     st.markdown("O B&B foi executado para encontrar o subconjunto de *features* que maximiza o score $R^2$ em um modelo de Regressão Linear, dentro de uma restrição de *budget* (número máximo de features).")
     st.write("---")
 
-    if bnb_summary and bnb_tree:
+    tree_log_mode = (bnb_summary or {}).get('execution_metrics', {}).get('tree_log_mode', 'full')
+    incremental_metrics = (bnb_summary or {}).get('incremental_metrics')
+
+    if bnb_summary and (bnb_tree or tree_log_mode == 'telemetry' or incremental_metrics):
         st.subheader("2.1 Métricas do Algoritmo")
         metrics = bnb_summary.get('execution_metrics', {})
         final_solution = bnb_summary.get('final_solution', {})
@@ -347,21 +577,63 @@ elif page == "2. Execução do Branch and Bound":
         
         st.write("---")
 
-        st.subheader("2.3 Visualização Estrutural Interativa da Árvore de Busca")
-        st.markdown(
-            "Use o mouse para **dar zoom, arrastar (pan)** e inspecionar os detalhes de cada nó (status, R² e decisão) **passando o mouse sobre eles (hover)**."
-        )
+        if incremental_metrics:
+            # A árvore exportada é a do último solve completo, com menos linhas:
+            # mostrá-la ao lado deste sumário seria contraditório
+            st.subheader("2.3 Re-solve Incremental")
+            st.info(
+                "Esta execução foi um **re-solve incremental** (`--incremental`). Só as linhas novas foram processadas, e não foi gerada uma árvore de busca nova. "
+                "A árvore do último solve completo não corresponde aos dados atuais, por isso não é mostrada. Execute o solver sem `--incremental` para a voltar a gerar."
+            )
+            col_rows, col_frontier, col_previous = st.columns(3)
+            col_rows.metric("Linhas Processadas", f"{incremental_metrics.get('rows_processed', 0)} de {incremental_metrics.get('rows_total', 0)}")
+            col_frontier.metric("Fronteira Reaberta", f"{incremental_metrics.get('frontier_reopened', 0)} de {incremental_metrics.get('frontier_size', 0)}")
+            col_previous.metric("Solução Anterior Ainda Viável", "Sim" if incremental_metrics.get('previous_optimum_still_feasible') else "Não")
+
+        elif tree_log_mode == 'telemetry':
+            st.subheader("2.3 Telemetria Agregada da Árvore de Busca")
+            st.markdown(
+                "Esta execução usou o modo de **telemetria** (`--telemetry`): em vez de cada nó, foram guardados resumos de tamanho fixo. "
+                "Os gráficos abaixo mostram a árvore de forma agregada."
+            )
+
+            if bnb_telemetry:
+                st.metric("Total de Nós na Árvore", bnb_telemetry.get('nodes_total', 0))
+                telemetry_figures = generate_telemetry_figures(bnb_telemetry)
+
+                col_status, col_prune = st.columns(2)
+                if 'status' in telemetry_figures:
+                    col_status.plotly_chart(telemetry_figures['status'], use_container_width=True)
+                if 'prune_rate' in telemetry_figures:
+                    col_prune.plotly_chart(telemetry_figures['prune_rate'], use_container_width=True)
+                if 'score_histogram' in telemetry_figures:
+                    st.plotly_chart(telemetry_figures['score_histogram'], use_container_width=True)
+                if 'sample' in telemetry_figures:
+                    st.plotly_chart(telemetry_figures['sample'], use_container_width=True)
+
+                st.write("Caminhos até cada nova melhor solução:")
+                for incumbent in bnb_telemetry.get('incumbent_paths', []):
+                    path_text = " → ".join(step['decision'] for step in incumbent.get('path', []))
+                    st.markdown(f"**{incumbent.get('feature_count')} features** (R²: {incumbent.get('score', 0):.4f}): {path_text}")
+            else:
+                st.warning("O ficheiro de telemetria não pôde ser carregado (deve ser: '../feature_selection/export_bnb_telemetry.json').")
+
+        else:
+            st.subheader("2.3 Visualização Estrutural Interativa da Árvore de Busca")
+            st.markdown(
+                "Use o mouse para **dar zoom, arrastar (pan)** e inspecionar os detalhes de cada nó (status, R² e decisão) **passando o mouse sobre eles (hover)**."
+            )
         
-        col_legend1, col_legend2, col_legend3, col_legend4, col_legend5 = st.columns(5)
-        col_legend1.markdown(f"Cor: <span style='background-color: #4CAF50; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Ótimo Global**", unsafe_allow_html=True)
-        col_legend2.markdown(f"Cor: <span style='background-color: #4DD0E1; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Solução Viável**", unsafe_allow_html=True)
-        col_legend3.markdown(f"Cor: <span style='background-color: #FFAB91; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Podado por Cota**", unsafe_allow_html=True)
-        col_legend4.markdown(f"Cor: <span style='background-color: #FFCDD2; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Podado por Inviabilidade**", unsafe_allow_html=True)
-        col_legend5.markdown(f"Cor: <span style='background-color: #E0F7FA; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Explorado/Raiz**", unsafe_allow_html=True)
-        st.write("\n")
-
-        fig = generate_plotly_tree_viz(bnb_tree, bnb_summary)
-        st.plotly_chart(fig, use_container_width=False)
+            col_legend1, col_legend2, col_legend3, col_legend4, col_legend5 = st.columns(5)
+            col_legend1.markdown(f"Cor: <span style='background-color: #4CAF50; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Ótimo Global**", unsafe_allow_html=True)
+            col_legend2.markdown(f"Cor: <span style='background-color: #4DD0E1; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Solução Viável**", unsafe_allow_html=True)
+            col_legend3.markdown(f"Cor: <span style='background-color: #FFAB91; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Podado por Cota**", unsafe_allow_html=True)
+            col_legend4.markdown(f"Cor: <span style='background-color: #FFCDD2; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Podado por Inviabilidade**", unsafe_allow_html=True)
+            col_legend5.markdown(f"Cor: <span style='background-color: #E0F7FA; padding: 2px; border-radius: 3px;'>&nbsp;&nbsp;</span> **Explorado/Raiz**", unsafe_allow_html=True)
+            st.write("\n")
+
+            fig = generate_plotly_tree_viz(bnb_tree, bnb_summary)
+            st.plotly_chart(fig, use_container_width=False)
         
     else:
         st.warning("Dados de resumo ou árvore do B&B não puderam ser carregados. Verifique se os caminhos dos arquivos JSON estão corretos (deve ser: '../feature_selection/nome_do_arquivo.json').")
@@ -459,4 +731,52 @@ elif page == "3. Resultados e Validação":
             st.warning("Dados de comparação da heurística não puderam ser carregados.")
 
     else:
-        st.warning("Dados de resumo ou comparação da heurística não puderam ser carregados. Verifique se os caminhos dos arquivos JSON estão corretos (deve ser: '../feature_selection/nome_do_arquivo.json').")
\ No newline at end of file
+        st.warning("Dados de resumo ou comparação da heurística não puderam ser carregados. Verifique se os caminhos dos arquivos JSON estão corretos (deve ser: '../feature_selection/nome_do_arquivo.json').")
+
+    st.write("---")
+    st.subheader("3.3 Estabilidade da Seleção (Bootstrap)")
+    st.markdown("O B&B foi repetido em várias reamostragens bootstrap do dataset. Uma feature escolhida em quase todas as reamostragens é uma escolha **estável**; uma feature escolhida só às vezes depende da amostra.")
+
+    if bnb_stability:
+        col_resamples, col_infeasible = st.columns(2)
+        col_resamples.metric("Reamostragens Bootstrap", bnb_stability.get('n_resamples', 0))
+        col_infeasible.metric("Reamostragens sem Solução", bnb_stability.get('infeasible_resamples', 0))
+
+        col_freq, col_size = st.columns(2)
+
+        with col_freq:
+            df_freq = pd.DataFrame(bnb_stability.get('feature_selection_frequency', []))
+            if not df_freq.empty:
+                fig_freq = px.bar(
+                    df_freq.sort_values('frequency'),
+                    x='frequency',
+                    y='feature',
+                    orientation='h',
+                    title='Frequência de Seleção por Feature',
+                    color_discrete_sequence=['#5e4fa2']
+                )
+                fig_freq.update_layout(xaxis_title='Fração das Reamostragens', yaxis_title='', xaxis_tickformat='.0%')
+                st.plotly_chart(fig_freq, use_container_width=True)
+
+        with col_size:
+            df_size = pd.DataFrame(bnb_stability.get('optimal_size_distribution', []))
+            if not df_size.empty:
+                fig_size = px.bar(
+                    df_size,
+                    x='feature_count',
+                    y='count',
+                    title='Distribuição do Nº Ótimo de Features',
+                    color_discrete_sequence=['#d53e4f']
+                )
+                fig_size.update_layout(xaxis_title='Nº de Features da Solução Ótima', yaxis_title='Nº de Reamostragens')
+                fig_size.update_xaxes(dtick=1)
+                st.plotly_chart(fig_size, use_container_width=True)
+
+        df_subsets = pd.DataFrame(bnb_stability.get('most_frequent_subsets', []))
+        if not df_subsets.empty:
+            st.write("Subconjuntos ótimos mais frequentes:")
+            df_subsets['Features'] = df_subsets['features'].apply(lambda x: ', '.join(x))
+            df_subsets = df_subsets.rename(columns={'count': 'Nº de Reamostragens', 'frequency': 'Frequência'})
+            st.dataframe(df_subsets[['Features', 'Nº de Reamostragens', 'Frequência']], hide_index=True, use_container_width=True)
+    else:
+        st.info("Execute `python bnb_feature_selection.py --stability` para gerar o ficheiro `export_bnb_stability.json`.")
\ No newline at end of file
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import io
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
@@ -6,11 +7,50 @@ from sklearn.metrics import r2_score
 import sys
 import time
 import json
+import os
+import hashlib
+import itertools
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
 
 # --- Configuração do Problema ---
 # "meta" (restrição)
 MINIMUM_R2_SCORE = 0.30
 
+# Modo incremental: reaproveita o estado do último solve e processa só as
+# linhas novas do CSV (ativar com `python bnb_feature_selection.py --incremental`)
+INCREMENTAL_MODE = "--incremental" in sys.argv
+STATE_FILE_PATH = "state_bnb_incremental.json"
+# O estado só é guardado com `--incremental` ou `--save-state` (não em todos os solves)
+SAVE_STATE = INCREMENTAL_MODE or "--save-state" in sys.argv
+# Fronteiras maiores do que isto (C(p, k-1) subconjuntos) não são guardadas:
+# o próximo `--incremental` faz um solve completo
+INCREMENTAL_MAX_FRONTIER = 5000
+
+# Triagem por correlação antes do B&B (ativar com `--screening`;
+# `--verify-screening` confirma o resultado contra o espaço de busca completo)
+VERIFY_SCREENING = "--verify-screening" in sys.argv
+SCREENING_MODE = "--screening" in sys.argv or VERIFY_SCREENING
+CORRELATION_CLUSTER_THRESHOLD = 0.80 # |r| a partir do qual duas features são "quase duplicadas"
+MIN_TARGET_CORRELATION = 0.05 # |r| mínimo com o alvo para uma feature ser mantida...
+MIN_UNIQUE_CONTRIBUTION = 0.001 # ...ou R2 que a feature acrescenta ao modelo completo
+CLUSTER_REPRESENTATIVES_FIRST = True # Procurar primeiro só nos representantes de cada cluster
+
+# Estabilidade da seleção por bootstrap (ativar com `--stability`)
+STABILITY_MODE = "--stability" in sys.argv
+BOOTSTRAP_RESAMPLES = 200
+BOOTSTRAP_SEED = 42
+BOOTSTRAP_WORKERS = os.cpu_count() or 1
+
+# Telemetria agregada: em vez de guardar cada nó da árvore, mantém resumos de
+# tamanho fixo (ativar com `--telemetry`, para buscas grandes demais para o log completo)
+TELEMETRY_MODE = "--telemetry" in sys.argv
+TELEMETRY_RESERVOIR_SIZE = 500 # Nós completos guardados por amostragem (reservoir sampling)
+TELEMETRY_SCORE_BINS = 20 # Intervalos do histograma de R2 (entre 0 e 1) por profundidade
+TELEMETRY_MAX_TIME_BUCKETS = 100 # Pontos da série temporal da taxa de poda
+TELEMETRY_SEED = 42
+
 # --- Variáveis Globais para Rastreamento ---
 best_solution_features = []
 best_solution_feature_count = float('inf')
@@ -19,7 +59,22 @@ nodes_visited = 0
 # --- Estruturas de Dados para Exportação ---
 tree_data_log = []
 solutions_found_log = []
+solutions_found_count = 0
 node_id_counter = 0
+current_path = [] # Nós EXPLORADO desde a raiz até ao nó atual
+
+# --- Telemetria Agregada (memória constante, independente do tamanho da árvore) ---
+telemetry = {
+    "nodes_total": 0,
+    "status_by_depth": {}, # profundidade -> {status: contagem}
+    "score_histogram_by_depth": {}, # profundidade -> contagens por intervalo de R2
+    "prune_timeline": [], # [{"nodes": ..., "pruned": ...}] por intervalo de tempo (em nós)
+    "prune_bucket_width": 1,
+    "current_bucket": {"nodes": 0, "pruned": 0},
+    "reservoir": [],
+    "incumbent_paths": []
+}
+telemetry_rng = random.Random(TELEMETRY_SEED)
 
 # --- Carregar e Preparar os Dados ---
 try:
@@ -33,6 +88,10 @@ except Exception as e:
 
 TARGET_VARIABLE = 'quality'
 ALL_FEATURES = [col for col in df.columns if col not in ['Id', TARGET_VARIABLE]]
+FEATURE_INDEX = {feature: i for i, feature in enumerate(ALL_FEATURES)}
+
+# Features sobre as quais o B&B ramifica (reduzido pela triagem por correlação)
+search_features = list(ALL_FEATURES)
 
 try:
     X_all = df[ALL_FEATURES]
@@ -69,6 +128,157 @@ def train_and_evaluate(features_to_use: list) -> float:
         print(f"Erro durante o treino com features {features_to_use}: {e}")
         return -float('inf')
 
+# --- Estatísticas Suficientes (R2 sem treinar modelos) ---
+def compute_sufficient_stats(df_rows) -> dict:
+    """
+    Calcula as estatísticas suficientes de [ALL_FEATURES..., TARGET_VARIABLE]
+    para um bloco de linhas: n, vetor de médias e matriz de co-momentos centrada.
+    """
+    Z = df_rows[ALL_FEATURES + [TARGET_VARIABLE]].to_numpy(dtype=float)
+    n_rows = Z.shape[0]
+    if n_rows == 0:
+        dim = len(ALL_FEATURES) + 1
+        return {"n": 0, "mean": np.zeros(dim), "comoment": np.zeros((dim, dim))}
+
+    mean = Z.mean(axis=0)
+    centered = Z - mean
+    return {"n": n_rows, "mean": mean, "comoment": centered.T @ centered}
+
+def merge_sufficient_stats(stats_a: dict, stats_b: dict) -> dict:
+    """
+    Junta as estatísticas de dois blocos de linhas (fórmula de Chan et al.).
+    O custo é O(p^2), independente do número de linhas já processadas.
+    """
+    n_a, n_b = stats_a["n"], stats_b["n"]
+    if n_a == 0:
+        return stats_b
+    if n_b == 0:
+        return stats_a
+
+    n_total = n_a + n_b
+    delta = stats_b["mean"] - stats_a["mean"]
+    return {
+        "n": n_total,
+        "mean": stats_a["mean"] + delta * (n_b / n_total),
+        "comoment": stats_a["comoment"] + stats_b["comoment"] + np.outer(delta, delta) * (n_a * n_b / n_total)
+    }
+
+def r2_from_stats(stats: dict, features_to_use: list) -> float:
+    """
+    R2 (no treino) da Regressão Linear com intercepto, calculado apenas a
+    partir das estatísticas suficientes. Equivale a train_and_evaluate().
+    """
+    if not features_to_use:
+        return -float('inf')
+
+    idx = [FEATURE_INDEX[f] for f in features_to_use]
+    target_idx = len(ALL_FEATURES)
+    C = stats["comoment"]
+    total_sum_squares = C[target_idx, target_idx]
+    if total_sum_squares <= 0:
+        return -float('inf')
+
+    c_xy = C[idx, target_idx]
+    coef, *_ = np.linalg.lstsq(C[np.ix_(idx, idx)], c_xy, rcond=None)
+    return float(coef @ c_xy / total_sum_squares)
+
+# --- Registo de Nós (Log Completo ou Telemetria Agregada) ---
+def record_node(node_log: dict, depth: int):
+    """
+    Regista um nó da árvore. No modo normal, guarda o nó em `tree_data_log`.
+    No modo de telemetria, atualiza apenas resumos de tamanho fixo.
+    """
+    if not TELEMETRY_MODE:
+        tree_data_log.append(node_log)
+        return
+
+    status = node_log["status"]
+    telemetry["nodes_total"] += 1
+
+    depth_counts = telemetry["status_by_depth"].setdefault(depth, {})
+    depth_counts[status] = depth_counts.get(status, 0) + 1
+
+    score = node_log["score"]
+    if score is not None and status != "PODADO_BOUND":
+        histogram = telemetry["score_histogram_by_depth"].setdefault(depth, [0] * TELEMETRY_SCORE_BINS)
+        bin_index = min(max(int(score * TELEMETRY_SCORE_BINS), 0), TELEMETRY_SCORE_BINS - 1)
+        histogram[bin_index] += 1
+
+    # Taxa de poda ao longo do tempo: quando há intervalos a mais, junta-os
+    # dois a dois e duplica a largura, para o número de pontos ficar limitado
+    bucket = telemetry["current_bucket"]
+    bucket["nodes"] += 1
+    bucket["pruned"] += status.startswith("PODADO")
+    if bucket["nodes"] == telemetry["prune_bucket_width"]:
+        timeline = telemetry["prune_timeline"]
+        timeline.append(dict(bucket))
+        bucket["nodes"] = bucket["pruned"] = 0
+        if len(timeline) == TELEMETRY_MAX_TIME_BUCKETS:
+            telemetry["prune_timeline"] = [
+                {"nodes": a["nodes"] + b["nodes"], "pruned": a["pruned"] + b["pruned"]}
+                for a, b in zip(timeline[0::2], timeline[1::2])
+            ]
+            telemetry["prune_bucket_width"] *= 2
+
+    # Amostra uniforme dos nós completos (reservoir sampling, algoritmo R)
+    record = dict(node_log, depth=depth)
+    reservoir = telemetry["reservoir"]
+    if len(reservoir) < TELEMETRY_RESERVOIR_SIZE:
+        reservoir.append(record)
+    else:
+        j = telemetry_rng.randrange(telemetry["nodes_total"])
+        if j < TELEMETRY_RESERVOIR_SIZE:
+            reservoir[j] = record
+
+    # Caminho completo (raiz -> nó) de cada nova melhor solução
+    if status == "SOLUCAO_OTIMA_ATUAL":
+        telemetry["incumbent_paths"].append({
+            "node_id": node_log["id"],
+            "features": node_log["features"],
+            "feature_count": node_log["feature_count"],
+            "score": score,
+            "path": [
+                {"id": n["id"], "decision": n["decision"], "score": n["score"]}
+                for n in current_path + [node_log]
+            ]
+        })
+
+def export_telemetry() -> dict:
+    """
+    Converte a telemetria agregada para o formato de exportação (JSON).
+    """
+    timeline = list(telemetry["prune_timeline"])
+    if telemetry["current_bucket"]["nodes"] > 0:
+        timeline.append(dict(telemetry["current_bucket"]))
+
+    nodes_seen = 0
+    prune_rate_timeline = []
+    for bucket in timeline:
+        nodes_seen += bucket["nodes"]
+        prune_rate_timeline.append({
+            "nodes_processed": nodes_seen,
+            "prune_rate": bucket["pruned"] / bucket["nodes"]
+        })
+
+    return {
+        "nodes_total": telemetry["nodes_total"],
+        "status_by_depth": [
+            {"depth": depth, "status": status, "count": count}
+            for depth, counts in sorted(telemetry["status_by_depth"].items())
+            for status, count in counts.items()
+        ],
+        "score_histogram_by_depth": {
+            "bin_edges": [i / TELEMETRY_SCORE_BINS for i in range(TELEMETRY_SCORE_BINS + 1)],
+            "counts": [
+                {"depth": depth, "counts": counts}
+                for depth, counts in sorted(telemetry["score_histogram_by_depth"].items())
+            ]
+        },
+        "prune_rate_timeline": prune_rate_timeline,
+        "reservoir_sample": sorted(telemetry["reservoir"], key=lambda n: n["id"]),
+        "incumbent_paths": telemetry["incumbent_paths"]
+    }
+
 # --- O Algoritmo Branch and Bound (Modificado para Log) ---
 def solve_feature_selection_bnb(
     current_feature_index: int,
@@ -78,10 +288,10 @@ def solve_feature_selection_bnb(
 ):
     """
     Função B&B recursiva que agora regista cada nó visitado
-    para a exportação da árvore.
+    para a exportação da árvore (ou para a telemetria agregada).
     """
     global best_solution_feature_count, best_solution_features
-    global node_id_counter, tree_data_log, solutions_found_log
+    global node_id_counter, solutions_found_count
 
     # --- Setup do Nó Atual ---
     node_id = node_id_counter
@@ -100,7 +310,7 @@ def solve_feature_selection_bnb(
     # --- 1. LÓGICA DE PODA (PRUNING) B&B ---
     if len(current_features_list) >= best_solution_feature_count:
         node_log["status"] = "PODADO_BOUND"
-        tree_data_log.append(node_log)
+        record_node(node_log, current_feature_index)
         return
 
     # --- 2. AVALIAR O NÓ ATUAL ---
@@ -114,7 +324,10 @@ def solve_feature_selection_bnb(
             "feature_count": len(current_features_list),
             "score": model_score
         }
-        solutions_found_log.append(solution_data)
+        solutions_found_count += 1
+        # Na telemetria, só as soluções que mudam a melhor atual (no máximo uma por tamanho)
+        if not TELEMETRY_MODE or len(current_features_list) < best_solution_feature_count:
+            solutions_found_log.append(solution_data)
 
         if len(current_features_list) < best_solution_feature_count:
             print("*" * 40)
@@ -132,20 +345,21 @@ def solve_feature_selection_bnb(
         else:
             node_log["status"] = "PODADO_SOLUCAO_PIOR"
 
-        tree_data_log.append(node_log)
+        record_node(node_log, current_feature_index)
         return
 
     # --- 4. CONDIÇÃO DE PARAGEM (FIM DA ÁRVORE) ---
-    if current_feature_index >= len(ALL_FEATURES):
+    if current_feature_index >= len(search_features):
         node_log["status"] = "FOLHA_INVALIDA"
-        tree_data_log.append(node_log)
+        record_node(node_log, current_feature_index)
         return
 
     # --- 5. LÓGICA DE RAMIFICAÇÃO (BRANCHING) ---
     node_log["status"] = "EXPLORADO"
-    tree_data_log.append(node_log)
+    record_node(node_log, current_feature_index)
+    current_path.append(node_log)
     
-    next_feature = ALL_FEATURES[current_feature_index]
+    next_feature = search_features[current_feature_index]
     next_index = current_feature_index + 1
 
     # Ramo 1: "NÃO INCLUIR" a próxima feature
@@ -165,6 +379,8 @@ def solve_feature_selection_bnb(
         decision_text=f"INCLUIR {next_feature}"
     )
 
+    current_path.pop()
+
 # --- Heurística Gulosa (Greedy) para Comparação ---
 def run_greedy_heuristic():
     """
@@ -206,31 +422,609 @@ def run_greedy_heuristic():
     print("Heurística Gulosa completa.")
     return greedy_steps_log
 
+# --- Modo Incremental (Re-solve com Linhas Novas) ---
+def hash_dataset_rows(df_rows) -> str:
+    """
+    Impressão digital das linhas já processadas, para garantir que o CSV
+    só recebeu linhas novas no fim (e não foi editado ou reordenado).
+    """
+    # Converter para float (como em compute_sufficient_stats): uma linha nova que
+    # mude o tipo inferido de uma coluna não deve alterar o hash das linhas antigas
+    row_hashes = pd.util.hash_pandas_object(df_rows[ALL_FEATURES + [TARGET_VARIABLE]].astype(float), index=False)
+    return hashlib.sha256(row_hashes.to_numpy().tobytes()).hexdigest()
+
+def build_frontier(stats: dict, best_count) -> list:
+    """
+    Fronteira de inviabilidade: os maiores subconjuntos que não atingem a meta.
+    Como o R2 nunca desce ao adicionar features, se todos os subconjuntos com
+    (best_count - 1) features são inviáveis, todos os menores também o são.
+    Retorna None se a fronteira tiver mais de INCREMENTAL_MAX_FRONTIER subconjuntos.
+    """
+    if best_count != float('inf') and best_count > 1 and math.comb(len(ALL_FEATURES), best_count - 1) > INCREMENTAL_MAX_FRONTIER:
+        return None
+
+    if best_count == float('inf'):
+        frontier_sets = [list(ALL_FEATURES)]
+    elif best_count <= 1:
+        frontier_sets = []
+    else:
+        frontier_sets = [list(c) for c in itertools.combinations(ALL_FEATURES, best_count - 1)]
+
+    return [{"features": features, "score": r2_from_stats(stats, features)} for features in frontier_sets]
+
+def save_incremental_state(stats: dict, best_features: list, frontier: list, cold_nodes_visited: int, cold_rows: int):
+    """
+    Guarda o estado necessário para o próximo solve incremental.
+    `cold_nodes_visited` e `cold_rows` descrevem o último solve completo (a referência de trabalho).
+    """
+    state = {
+        "features": ALL_FEATURES,
+        "target": TARGET_VARIABLE,
+        "r2_goal": MINIMUM_R2_SCORE,
+        "n_rows": stats["n"],
+        "rows_hash": hash_dataset_rows(df.iloc[:stats["n"]]),
+        "mean": stats["mean"].tolist(),
+        "comoment": stats["comoment"].tolist(),
+        "best_features": best_features,
+        "frontier": [
+            {"features": entry["features"], "score": entry["score"] if entry["score"] != -float('inf') else None}
+            for entry in frontier
+        ] if frontier is not None else None,
+        "cold_nodes_visited": cold_nodes_visited,
+        "cold_rows": cold_rows
+    }
+    try:
+        with open(STATE_FILE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        print(f"  - '{STATE_FILE_PATH}' (ESTADO INCREMENTAL) ... OK")
+    except Exception as e:
+        print(f"  - ERRO ao exportar '{STATE_FILE_PATH}': {e}")
+
+def load_incremental_state():
+    """
+    Carrega e valida o estado do solve anterior.
+    Retorna None se o estado não existir ou não for compatível com os dados atuais.
+    """
+    if not os.path.exists(STATE_FILE_PATH):
+        print(f"Estado '{STATE_FILE_PATH}' não encontrado.")
+        return None
+    try:
+        with open(STATE_FILE_PATH, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except Exception as e:
+        print(f"Erro ao ler o estado '{STATE_FILE_PATH}': {e}")
+        return None
+
+    if state.get("features") != ALL_FEATURES or state.get("target") != TARGET_VARIABLE:
+        print("O estado guardado foi gerado com outras colunas.")
+        return None
+    if state.get("r2_goal") != MINIMUM_R2_SCORE:
+        print(f"O estado guardado foi gerado com outra meta de R2 ({state.get('r2_goal')}).")
+        return None
+    if state["n_rows"] > len(df) or hash_dataset_rows(df.iloc[:state["n_rows"]]) != state["rows_hash"]:
+        print("As linhas já processadas foram alteradas (o CSV não cresceu só no fim).")
+        return None
+    if state.get("frontier") is None:
+        print(f"A fronteira do solve anterior não foi guardada (mais de {INCREMENTAL_MAX_FRONTIER} subconjuntos).")
+        return None
+
+    return state
+
+def solve_feature_selection_bnb_stats(
+    stats: dict,
+    universe: list,
+    current_feature_index: int,
+    current_features_list: list,
+    lower_bound: int,
+    known_infeasible: list,
+    search: dict,
+    explore_ties: bool = False
+):
+    """
+    Variante do B&B sem log de árvore, avaliada com as estatísticas suficientes.
+    Nós com menos de `lower_bound` features, ou contidos num subconjunto de
+    `known_infeasible`, são inviáveis por monotonia e não são avaliados.
+    Com `explore_ties`, continua a explorar subconjuntos do tamanho da melhor
+    solução e, em caso de empate no tamanho, fica a de maior R2 (em vez da primeira).
+    """
+    if len(current_features_list) > search["best_count"]:
+        return
+    if len(current_features_list) == search["best_count"] and not explore_ties:
+        return
+
+    current_set = frozenset(current_features_list)
+    if len(current_features_list) < lower_bound or any(current_set <= s for s in known_infeasible):
+        search["skipped"] += 1
+        model_score = -float('inf')
+    else:
+        search["evaluations"] += 1
+        model_score = r2_from_stats(stats, current_features_list)
+
+    if model_score >= MINIMUM_R2_SCORE:
+        if len(current_features_list) < search["best_count"] or model_score > search["best_score"]:
+            search["best_count"] = len(current_features_list)
+            search["best_features"] = list(current_features_list)
+            search["best_score"] = model_score
+        return
+
+    # Inviável já com o tamanho da melhor solução: os filhos não podem empatar
+    if current_feature_index >= len(universe) or len(current_features_list) >= search["best_count"]:
+        return
+
+    next_feature = universe[current_feature_index]
+    for features in (current_features_list, current_features_list + [next_feature]):
+        solve_feature_selection_bnb_stats(
+            stats, universe, current_feature_index + 1, features,
+            lower_bound, known_infeasible, search, explore_ties
+        )
+
+def run_incremental_solve() -> bool:
+    """
+    Re-solve incremental: junta só as linhas novas às estatísticas guardadas,
+    re-verifica a solução anterior e a fronteira de inviabilidade, e reabre
+    apenas as partes da árvore cuja viabilidade pode ter mudado.
+    Retorna False se for necessário um solve completo (cold).
+    """
+    print("\n" + "-" * 40)
+    print("A iniciar o re-solve INCREMENTAL...")
+    state = load_incremental_state()
+    if state is None:
+        return False
+
+    start_time = time.time()
+    previous_stats = {
+        "n": state["n_rows"],
+        "mean": np.array(state["mean"]),
+        "comoment": np.array(state["comoment"])
+    }
+    new_rows = df.iloc[state["n_rows"]:]
+    stats = merge_sufficient_stats(previous_stats, compute_sufficient_stats(new_rows))
+    print(f"Linhas anteriores: {previous_stats['n']} | Linhas novas: {len(new_rows)}")
+
+    # 1. Re-verificar a solução ótima anterior
+    previous_best = state["best_features"]
+    previous_count = len(previous_best) if previous_best else float('inf')
+    evaluations = 0
+    previous_best_score = -float('inf')
+    if previous_best:
+        previous_best_score = r2_from_stats(stats, previous_best)
+        evaluations += 1
+    previous_best_feasible = previous_best_score >= MINIMUM_R2_SCORE
+
+    # 2. Re-verificar a fronteira (subconjuntos inviáveis de tamanho previous_count - 1)
+    frontier = []
+    reopened = []
+    for entry in state["frontier"]:
+        score = r2_from_stats(stats, entry["features"])
+        evaluations += 1
+        frontier.append({"features": entry["features"], "score": score})
+        if score >= MINIMUM_R2_SCORE:
+            reopened.append(entry["features"])
+
+    search = {
+        "best_count": previous_count if previous_best_feasible else float('inf'),
+        "best_features": previous_best if previous_best_feasible else [],
+        "best_score": previous_best_score if previous_best_feasible else None,
+        "evaluations": 0,
+        "skipped": 0
+    }
+
+    # 3. Reabrir só o necessário
+    if reopened:
+        # Uma solução menor tem de estar contida num subconjunto da fronteira
+        # que ficou viável; o resto da fronteira continua a provar inviabilidade.
+        still_infeasible = [frozenset(e["features"]) for e in frontier if e["score"] < MINIMUM_R2_SCORE]
+        for features in reopened:
+            solve_feature_selection_bnb_stats(stats, features, 0, [], 0, still_infeasible, search)
+    elif not previous_best_feasible and previous_best:
+        # A fronteira continua inviável: nenhum subconjunto com menos de
+        # previous_count features pode ser solução.
+        solve_feature_selection_bnb_stats(stats, ALL_FEATURES, 0, [], previous_count, [], search)
+
+    evaluations += search["evaluations"]
+    best_count = search["best_count"]
+    best_features = search["best_features"]
+
+    # A fronteira só precisa de ser recalculada se o tamanho ótimo mudou
+    if best_count != previous_count:
+        frontier = build_frontier(stats, best_count)
+        evaluations += len(frontier) if frontier is not None else 0
+
+    total_time = time.time() - start_time
+    # Poupança principal: só as linhas novas foram lidas para as estatísticas
+    rows_saved = stats["n"] - len(new_rows)
+
+    # Comparação de avaliações só aproximada: R2 pelas estatísticas (aqui) vs.
+    # treinos sklearn do último solve completo, feito com menos linhas
+    cold_nodes_visited = state.get("cold_nodes_visited", 0)
+    cold_rows = state.get("cold_rows", previous_stats["n"])
+    evaluations_saved = max(cold_nodes_visited - evaluations, 0)
+
+    print("\n" + "=" * 40)
+    print("RE-SOLVE INCREMENTAL COMPLETO.")
+    print(f"Tempo Total: {total_time:.4f} segundos")
+    print(f"Solução anterior ainda viável: {'SIM' if previous_best_feasible else 'NÃO'}")
+    print(f"Subconjuntos da fronteira reabertos: {len(reopened)} de {len(state['frontier'])}")
+    print(f"Linhas processadas: {len(new_rows)} de {stats['n']} "
+          f"({rows_saved} linhas não relidas, {rows_saved / stats['n'] * 100:.1f}% do dataset)")
+    print(f"Avaliações de R2: {evaluations}")
+    print(f"Nós ignorados por inviabilidade conhecida: {search['skipped']}")
+    print(f"Comparação aproximada com o último solve completo ({cold_nodes_visited} treinos sklearn, com {cold_rows} linhas): ", end="")
+    if evaluations_saved > 0:
+        print(f"~{evaluations_saved} avaliações a menos")
+    else:
+        print("sem redução de avaliações")
+
+    final_solution = {}
+    solutions_found = []
+    if best_count != float('inf'):
+        print(f"MELHOR SOLUÇÃO (ÓTIMA):")
+        print(f"  Features: {best_features}")
+        print(f"  N.º de Features: {best_count}")
+        final_solution = {
+            "features": best_features,
+            "feature_count": best_count,
+            "r2_score": search["best_score"]
+        }
+        solutions_found = [{"features": best_features, "feature_count": best_count, "score": search["best_score"]}]
+    else:
+        print("Nenhuma solução encontrada que atinja a meta de R2.")
+
+    print("\nA exportar ficheiros JSON para o dashboard...")
+    summary_data = {
+        "final_solution": final_solution,
+        "execution_metrics": {
+            "total_time_seconds": total_time,
+            "nodes_visited": evaluations,
+            "solutions_found_count": len(solutions_found),
+            "r2_goal": MINIMUM_R2_SCORE
+        },
+        "solutions_timeline": solutions_found,
+        "incremental_metrics": {
+            "rows_previous": previous_stats["n"],
+            "rows_new": len(new_rows),
+            "rows_processed": len(new_rows),
+            "rows_total": stats["n"],
+            "previous_optimum_still_feasible": previous_best_feasible,
+            "frontier_size": len(state["frontier"]),
+            "frontier_reopened": len(reopened),
+            "r2_evaluations": evaluations,
+            "nodes_skipped_known_infeasible": search["skipped"],
+            "last_cold_nodes_visited": cold_nodes_visited,
+            "last_cold_rows": cold_rows,
+            "approx_evaluations_saved_vs_last_cold": evaluations_saved
+        }
+    }
+    try:
+        with open('export_bnb_summary.json', 'w', encoding='utf-8') as f:
+            json.dump(summary_data, f, indent=2, ensure_ascii=False)
+        print("  - 'export_bnb_summary.json' (SUMÁRIO B&B INCREMENTAL) ... OK")
+    except Exception as e:
+        print(f"  - ERRO ao exportar 'export_bnb_summary.json': {e}")
+
+    # A comparação com a heurística passa a usar a solução ótima atual
+    # (os passos da heurística são os do último solve completo)
+    try:
+        heuristic_data = {"greedy_heuristic_steps": []}
+        if os.path.exists('export_heuristic_comparison.json'):
+            with open('export_heuristic_comparison.json', 'r', encoding='utf-8') as f:
+                heuristic_data = json.load(f)
+        heuristic_data["bnb_optimal"] = final_solution
+        with open('export_heuristic_comparison.json', 'w', encoding='utf-8') as f:
+            json.dump(heuristic_data, f, indent=2, ensure_ascii=False)
+        print("  - 'export_heuristic_comparison.json' (ÓTIMO B&B ATUALIZADO) ... OK")
+    except Exception as e:
+        print(f"  - ERRO ao exportar 'export_heuristic_comparison.json': {e}")
+
+    save_incremental_state(stats, best_features, frontier, cold_nodes_visited, cold_rows)
+    return True
+
+# --- Triagem por Correlação (Redução do Espaço de Busca) ---
+def correlation_from_stats(stats: dict):
+    """
+    Matriz de correlação de [ALL_FEATURES..., TARGET_VARIABLE] a partir das
+    estatísticas suficientes. Features constantes ficam com correlação 0.
+    """
+    std = np.sqrt(np.clip(np.diag(stats["comoment"]), 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = stats["comoment"] / np.outer(std, std)
+    return np.nan_to_num(corr), std
+
+def screen_features_by_correlation(stats: dict) -> dict:
+    """
+    Reduz ALL_FEATURES antes do B&B, a partir da matriz de correlação:
+      - CONSTANTE / DUPLICADA: removidas sem perda (não alteram o R2 de nenhum subconjunto);
+      - OBRIGATORIA: sem ela nem o modelo completo atinge a meta (entra em todas as soluções);
+      - CONTRIBUICAO_BAIXA: pouco correlacionada com o alvo e quase sem R2 único (heurística);
+      - as restantes são agrupadas em clusters de features quase duplicadas.
+    """
+    corr, std = correlation_from_stats(stats)
+    target_idx = len(ALL_FEATURES)
+    dropped = []
+    candidates = []
+
+    for feature in ALL_FEATURES:
+        i = FEATURE_INDEX[feature]
+        if std[i] == 0:
+            dropped.append({"feature": feature, "reason": "CONSTANTE", "kept_instead": None})
+            continue
+        duplicate_of = next((c for c in candidates if abs(corr[i, FEATURE_INDEX[c]]) >= 1 - 1e-9), None)
+        if duplicate_of is not None:
+            dropped.append({"feature": feature, "reason": "DUPLICADA", "kept_instead": duplicate_of})
+            continue
+        candidates.append(feature)
+
+    full_score = r2_from_stats(stats, candidates)
+    if full_score < MINIMUM_R2_SCORE:
+        # Problema inviável: não há nada a provar, o B&B confirma-o sozinho
+        forced = []
+    else:
+        forced = [
+            f for f in candidates
+            if r2_from_stats(stats, [c for c in candidates if c != f]) < MINIMUM_R2_SCORE
+        ]
+
+    remaining = []
+    for feature in candidates:
+        if feature in forced:
+            continue
+        i = FEATURE_INDEX[feature]
+        unique_contribution = full_score - r2_from_stats(stats, [c for c in candidates if c != feature])
+        if abs(corr[i, target_idx]) < MIN_TARGET_CORRELATION and unique_contribution < MIN_UNIQUE_CONTRIBUTION:
+            dropped.append({"feature": feature, "reason": "CONTRIBUICAO_BAIXA", "kept_instead": None})
+            continue
+        remaining.append(feature)
+
+    # Clusters = componentes ligadas do grafo |r| >= CORRELATION_CLUSTER_THRESHOLD
+    clusters = []
+    unvisited = list(remaining)
+    while unvisited:
+        stack = [unvisited.pop(0)]
+        cluster = []
+        while stack:
+            feature = stack.pop()
+            cluster.append(feature)
+            linked = [
+                f for f in unvisited
+                if abs(corr[FEATURE_INDEX[feature], FEATURE_INDEX[f]]) >= CORRELATION_CLUSTER_THRESHOLD
+            ]
+            for f in linked:
+                unvisited.remove(f)
+            stack.extend(linked)
+        cluster.sort(key=remaining.index)
+        representative = max(cluster, key=lambda f: abs(corr[FEATURE_INDEX[f], target_idx]))
+        clusters.append({"representative": representative, "members": cluster})
+
+    return {
+        "forced": forced,
+        "search_features": remaining,
+        "clusters": clusters,
+        "dropped": dropped
+    }
+
+def verify_screening(stats: dict, screened_count) -> dict:
+    """
+    Resolve o problema no espaço completo (com as estatísticas suficientes)
+    e compara o tamanho ótimo com o obtido após a triagem.
+    """
+    search = {"best_count": float('inf'), "best_features": [], "best_score": None, "evaluations": 0, "skipped": 0}
+    solve_feature_selection_bnb_stats(stats, ALL_FEATURES, 0, [], 0, [], search)
+    full_count = search["best_count"] if search["best_count"] != float('inf') else None
+    screened = screened_count if screened_count != float('inf') else None
+    return {
+        "full_optimum_features": search["best_features"],
+        "full_optimum_count": full_count,
+        "screened_optimum_count": screened,
+        "matches": full_count == screened,
+        "full_space_evaluations": search["evaluations"]
+    }
+
+# --- Estabilidade da Seleção (Bootstrap) ---
+def compute_bootstrap_stats(n_resamples: int, seed: int) -> list:
+    """
+    Estatísticas suficientes de `n_resamples` reamostragens bootstrap numa só
+    passagem vetorizada. Cada reamostragem é representada pelas contagens de
+    cada linha (pesos), sem construir os DataFrames reamostrados.
+    """
+    Z = df[ALL_FEATURES + [TARGET_VARIABLE]].to_numpy(dtype=float)
+    n_rows = Z.shape[0]
+    Z_centered = Z - Z.mean(axis=0) # Centrar antes melhora a estabilidade numérica
+
+    rng = np.random.default_rng(seed)
+    weights = rng.multinomial(n_rows, np.full(n_rows, 1 / n_rows), size=n_resamples).astype(float)
+
+    means = weights @ Z_centered / n_rows
+    cross_products = np.einsum('bn,nd,ne->bde', weights, Z_centered, Z_centered, optimize=True)
+    comoments = cross_products - n_rows * np.einsum('bd,be->bde', means, means)
+
+    return [{"n": n_rows, "mean": means[b], "comoment": comoments[b]} for b in range(n_resamples)]
+
+def solve_bootstrap_resample(stats: dict) -> dict:
+    """
+    B&B (estatísticas suficientes) para uma reamostragem. Executado nos workers.
+    Entre subconjuntos ótimos do mesmo tamanho fica o de maior R2, para que a
+    frequência de seleção não dependa da ordem das colunas.
+    """
+    search = {"best_count": float('inf'), "best_features": [], "best_score": None, "evaluations": 0, "skipped": 0}
+    solve_feature_selection_bnb_stats(stats, ALL_FEATURES, 0, [], 0, [], search, explore_ties=True)
+    return {
+        "features": search["best_features"],
+        "feature_count": search["best_count"] if search["best_count"] != float('inf') else None,
+        "evaluations": search["evaluations"]
+    }
+
+def run_stability_selection():
+    """
+    Seleção de estabilidade: resolve o problema em BOOTSTRAP_RESAMPLES
+    reamostragens (em paralelo) e exporta a frequência com que cada feature
+    é escolhida e a distribuição do tamanho ótimo.
+    """
+    print("\n" + "-" * 40)
+    print("A iniciar a Seleção de Estabilidade (Bootstrap)...")
+    print(f"Reamostragens: {BOOTSTRAP_RESAMPLES} | Workers: {BOOTSTRAP_WORKERS} | Seed: {BOOTSTRAP_SEED}")
+    print("-" * 40)
+
+    start_time = time.time()
+    all_stats = compute_bootstrap_stats(BOOTSTRAP_RESAMPLES, BOOTSTRAP_SEED)
+    stats_time = time.time() - start_time
+
+    chunksize = max(1, BOOTSTRAP_RESAMPLES // (4 * BOOTSTRAP_WORKERS))
+    with ProcessPoolExecutor(max_workers=BOOTSTRAP_WORKERS) as executor:
+        results = list(executor.map(solve_bootstrap_resample, all_stats, chunksize=chunksize))
+    total_time = time.time() - start_time
+
+    feature_counts = {feature: 0 for feature in ALL_FEATURES}
+    size_counts = {}
+    subset_counts = {}
+    infeasible = 0
+    for result in results:
+        if result["feature_count"] is None:
+            infeasible += 1
+            continue
+        for feature in result["features"]:
+            feature_counts[feature] += 1
+        size_counts[result["feature_count"]] = size_counts.get(result["feature_count"], 0) + 1
+        subset_key = tuple(sorted(result["features"], key=FEATURE_INDEX.get))
+        subset_counts[subset_key] = subset_counts.get(subset_key, 0) + 1
+
+    feature_frequency = sorted(
+        [{"feature": f, "count": c, "frequency": c / BOOTSTRAP_RESAMPLES} for f, c in feature_counts.items()],
+        key=lambda entry: -entry["count"]
+    )
+    size_distribution = [
+        {"feature_count": k, "count": c, "frequency": c / BOOTSTRAP_RESAMPLES}
+        for k, c in sorted(size_counts.items())
+    ]
+    top_subsets = [
+        {"features": list(subset), "count": c, "frequency": c / BOOTSTRAP_RESAMPLES}
+        for subset, c in sorted(subset_counts.items(), key=lambda item: -item[1])[:10]
+    ]
+
+    print("\n" + "=" * 40)
+    print("SELEÇÃO DE ESTABILIDADE COMPLETA.")
+    print(f"Tempo Total: {total_time:.2f} segundos (estatísticas: {stats_time:.2f} s)")
+    print("Frequência de seleção por feature:")
+    for entry in feature_frequency:
+        print(f"  {entry['feature']:<22} {entry['frequency'] * 100:5.1f}%")
+    print("Distribuição do tamanho ótimo:")
+    for entry in size_distribution:
+        print(f"  {entry['feature_count']} features: {entry['count']} reamostragens")
+    if infeasible:
+        print(f"  Sem solução (meta não atingida): {infeasible} reamostragens")
+
+    stability_data = {
+        "n_resamples": BOOTSTRAP_RESAMPLES,
+        "random_seed": BOOTSTRAP_SEED,
+        "r2_goal": MINIMUM_R2_SCORE,
+        "feature_selection_frequency": feature_frequency,
+        "optimal_size_distribution": size_distribution,
+        "infeasible_resamples": infeasible,
+        "most_frequent_subsets": top_subsets,
+        "execution_metrics": {
+            "total_time_seconds": total_time,
+            "stats_time_seconds": stats_time,
+            "r2_evaluations": sum(result["evaluations"] for result in results),
+            "workers": BOOTSTRAP_WORKERS
+        }
+    }
+
+    print("\nA exportar ficheiros JSON para o dashboard...")
+    try:
+        with open('export_bnb_stability.json', 'w', encoding='utf-8') as f:
+            json.dump(stability_data, f, indent=2, ensure_ascii=False)
+        print("  - 'export_bnb_stability.json' (ESTABILIDADE BOOTSTRAP) ... OK")
+    except Exception as e:
+        print(f"  - ERRO ao exportar 'export_bnb_stability.json': {e}")
+
 # --- Função Principal de Execução e Exportação ---
 def main():
     global nodes_visited # Resetar o contador para não contar a heurística
+    global search_features
+
+    # 0. Modo Incremental (se houver estado compatível)
+    if INCREMENTAL_MODE:
+        if run_incremental_solve():
+            return
+        print("A executar o solve completo (cold)...")
+
+    # 0. Modo de Estabilidade (Bootstrap)
+    if STABILITY_MODE:
+        run_stability_selection()
+        return
     
     # 1. Executar Heurística
     nodes_visited = 0 # Não contar visitas da heurística no B&B
     greedy_results = run_greedy_heuristic()
     
-    # 2. Executar B&B
+    # 2. Triagem por Correlação (opcional)
+    screening = None
+    forced_features = []
+    if SCREENING_MODE:
+        stats = compute_sufficient_stats(df)
+        screening = screen_features_by_correlation(stats)
+        forced_features = screening["forced"]
+        search_features = screening["search_features"]
+
+        print("\n" + "-" * 40)
+        print("Triagem por correlação antes do B&B:")
+        for entry in screening["dropped"]:
+            extra = f" (mantida: {entry['kept_instead']})" if entry["kept_instead"] else ""
+            print(f"  - Removida '{entry['feature']}': {entry['reason']}{extra}")
+        print(f"  - Obrigatórias (entram em todas as soluções): {forced_features}")
+        for cluster in screening["clusters"]:
+            if len(cluster["members"]) > 1:
+                print(f"  - Cluster {cluster['members']} -> representante '{cluster['representative']}'")
+        print(f"  - Espaço de busca: 2^{len(ALL_FEATURES)} = {2 ** len(ALL_FEATURES)} -> 2^{len(search_features)} = {2 ** len(search_features)}")
+
+    # 3. Executar B&B
     print("\n" + "-" * 40)
     print("A iniciar o Branch and Bound para Feature Selection...")
     print(f"Objetivo: Minimizar features")
     print(f"Restrição (Meta): R2 Score >= {MINIMUM_R2_SCORE}")
-    print(f"Total de features para testar: {len(ALL_FEATURES)}")
+    print(f"Total de features para testar: {len(search_features)}")
     print("-" * 40)
 
     nodes_visited = 0
     start_time = time.time()
-    
-    solve_feature_selection_bnb(
-        current_feature_index=0,
-        current_features_list=[],
-        parent_id=-1, # -1 indica que é a raiz
-        decision_text="RAIZ"
-    )
+
+    multi_clusters = [c for c in screening["clusters"] if len(c["members"]) > 1] if screening else []
+    if multi_clusters and CLUSTER_REPRESENTATIVES_FIRST:
+        # Fase 1: só os representantes de cada cluster
+        reduced_features = list(search_features)
+        search_features = [c["representative"] for c in screening["clusters"]]
+        search_features.sort(key=reduced_features.index)
+        solve_feature_selection_bnb(
+            current_feature_index=0,
+            current_features_list=list(forced_features),
+            parent_id=-1,
+            decision_text="RAIZ (REPRESENTANTES)"
+        )
+
+        # Fase 2: expandir só os clusters cujo representante entrou na solução.
+        # Se os representantes não chegaram a nenhuma solução, nada indica
+        # quais clusters importam: expandir todos (todo o espaço reduzido).
+        expanded = set(search_features)
+        for cluster in multi_clusters:
+            if best_solution_feature_count == float('inf') or cluster["representative"] in best_solution_features:
+                expanded.update(cluster["members"])
+        added_count = len(expanded) - len(search_features)
+        print(f"Clusters expandidos: {added_count} features adicionadas aos representantes")
+        # Sem features novas, a fase 2 só repetiria a busca da fase 1
+        if added_count > 0:
+            search_features = [f for f in reduced_features if f in expanded]
+            solve_feature_selection_bnb(
+                current_feature_index=0,
+                current_features_list=list(forced_features),
+                parent_id=-1,
+                decision_text="RAIZ (EXPANSÃO)"
+            )
+    else:
+        solve_feature_selection_bnb(
+            current_feature_index=0,
+            current_features_list=list(forced_features),
+            parent_id=-1, # -1 indica que é a raiz
+            decision_text="RAIZ"
+        )
     
     end_time = time.time()
     total_time = end_time - start_time
@@ -239,7 +1033,7 @@ def main():
     print("B&B COMPLETO.")
     print(f"Tempo Total: {total_time:.2f} segundos")
     print(f"Total de modelos treinados (nós visitados): {nodes_visited}")
-    print(f"Total de soluções viáveis encontradas: {len(solutions_found_log)}")
+    print(f"Total de soluções viáveis encontradas: {solutions_found_count}")
     
     final_solution = {}
     if best_solution_feature_count != float('inf'):
@@ -262,16 +1056,33 @@ def main():
         print("Nenhuma solução encontrada que atinja a meta de R2.")
         print(f"Tente baixar o valor de 'MINIMUM_R2_SCORE' (atualmente {MINIMUM_R2_SCORE}).")
 
-    # 3. Exportar JSON
+    if screening is not None:
+        screening["original_search_space"] = 2 ** len(ALL_FEATURES)
+        screening["reduced_search_space"] = 2 ** len(screening["search_features"])
+        if VERIFY_SCREENING:
+            screening["verification"] = verify_screening(stats, best_solution_feature_count)
+            verification = screening["verification"]
+            print(f"Verificação no espaço completo: ótimo com {verification['full_optimum_count']} features "
+                  f"-> {'CONFERE' if verification['matches'] else 'NÃO CONFERE'} com a triagem")
+
+    # 4. Exportar JSON
     print("\nA exportar ficheiros JSON para o dashboard...")
 
-    # Arquivo 1: A Árvore de Busca Completa
-    try:
-        with open('export_bnb_tree.json', 'w', encoding='utf-8') as f:
-            json.dump(tree_data_log, f, indent=2, ensure_ascii=False)
-        print("  - 'export_bnb_tree.json' (LOG DA ÁRVORE) ... OK")
-    except Exception as e:
-        print(f"  - ERRO ao exportar 'export_bnb_tree.json': {e}")
+    # Arquivo 1: A Árvore de Busca Completa (ou a Telemetria Agregada)
+    if TELEMETRY_MODE:
+        try:
+            with open('export_bnb_telemetry.json', 'w', encoding='utf-8') as f:
+                json.dump(export_telemetry(), f, indent=2, ensure_ascii=False)
+            print("  - 'export_bnb_telemetry.json' (TELEMETRIA DA ÁRVORE) ... OK")
+        except Exception as e:
+            print(f"  - ERRO ao exportar 'export_bnb_telemetry.json': {e}")
+    else:
+        try:
+            with open('export_bnb_tree.json', 'w', encoding='utf-8') as f:
+                json.dump(tree_data_log, f, indent=2, ensure_ascii=False)
+            print("  - 'export_bnb_tree.json' (LOG DA ÁRVORE) ... OK")
+        except Exception as e:
+            print(f"  - ERRO ao exportar 'export_bnb_tree.json': {e}")
 
     # Arquivo 2: Sumário da Execução do B&B
     summary_data = {
@@ -279,11 +1090,14 @@ def main():
         "execution_metrics": {
             "total_time_seconds": total_time,
             "nodes_visited": nodes_visited,
-            "solutions_found_count": len(solutions_found_log),
-            "r2_goal": MINIMUM_R2_SCORE
+            "solutions_found_count": solutions_found_count,
+            "r2_goal": MINIMUM_R2_SCORE,
+            "tree_log_mode": "telemetry" if TELEMETRY_MODE else "full"
         },
         "solutions_timeline": solutions_found_log # Histórico de soluções encontradas
     }
+    if screening is not None:
+        summary_data["screening_metrics"] = screening
     try:
         with open('export_bnb_summary.json', 'w', encoding='utf-8') as f:
             json.dump(summary_data, f, indent=2, ensure_ascii=False)
@@ -303,5 +1117,10 @@ def main():
     except Exception as e:
         print(f"  - ERRO ao exportar 'export_heuristic_comparison.json': {e}")
 
+    # arquivo 4: Estado para o Modo Incremental (só se pedido)
+    if SAVE_STATE:
+        stats = compute_sufficient_stats(df)
+        save_incremental_state(stats, best_solution_features, build_frontier(stats, best_solution_feature_count), nodes_visited, stats["n"])
+
 if __name__ == "__main__":
     main()
\ No newline at end of file